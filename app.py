@@ -1,6 +1,21 @@
+import asyncio
+import bisect
+import hashlib
+import json
 import os
+import uuid
+from contextlib import suppress
 import streamlit as st
-from openai import OpenAI
+from openai import (
+    DEFAULT_CONNECTION_LIMITS,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+    NotFoundError,
+    OpenAI,
+    Timeout,
+)
+from openai.types.responses import Response
 from dotenv import load_dotenv
 
 # Load environment variables from .env
@@ -14,81 +29,496 @@ st.markdown(
     "Then chat with the documents to perform due diligence and generate investor-ready insights."
 )
 
+# Name given to each property's vector store
+VECTOR_STORE_NAME = "real_estate_due_diligence_store"
+
+# Metadata tag on the vector stores this app creates; stores without it
+# (e.g. other apps' stores in the same org) are never opened from a URL
+VECTOR_STORE_METADATA = {"app": "real-estate-rag"}
+
+# Property vector stores expire after this many days without use
+VECTOR_STORE_TTL_DAYS = 7
+
+# Max number of documents uploaded to OpenAI at the same time
+UPLOAD_CONCURRENCY = 8
+
+# Connection pool for OpenAI clients; with HTTP/2, concurrent requests
+# multiplex over a few connections instead of paying a TLS handshake each.
+# Built with the SDK's own Limits class (httpx or httpx2, depending on the openai version).
+HTTP_LIMITS = type(DEFAULT_CONNECTION_LIMITS)(max_connections=32, max_keepalive_connections=16)
+
+# Chat turns (question + answer) sent to the model verbatim; older turns are summarized
+HISTORY_TURNS = 6
+
+# Cheap model used to summarize older chat turns
+SUMMARY_MODEL = "gpt-5-mini"
+
+# file_search tool spec; vector_store_ids is filled in per call
+FILE_SEARCH_TOOL_TEMPLATE = {"type": "file_search", "vector_store_ids": None}
+
+RAG_INSTRUCTIONS = (
+    "You are a real estate due diligence analyst. "
+    "Use ONLY the uploaded documents (inspection reports, seller disclosures, appraisals, "
+    "HOA documents, etc.) to answer. Highlight major risks, estimated impact, and any "
+    "missing information. When possible, reference the source filenames."
+)
+
+INVESTOR_INSTRUCTIONS = (
+    "You are a real estate investment analyst. "
+    "Write clear, concise, investor-ready memos. "
+    "Be specific and tie every claim back to the uploaded documents wherever possible."
+)
+
+INVESTOR_PROMPT = (
+    "Create an investor-style memo for this property based ONLY on the uploaded documents. "
+    "Include the following sections:\n"
+    "1. High-Level Summary\n"
+    "2. Property Condition Overview\n"
+    "3. Major Risks (with severity)\n"
+    "4. Recommended Repairs / Capex Items\n"
+    "5. Potential Upside or Opportunities\n"
+    "6. Overall Recommendation (e.g., Buy / Cautious Buy / Pass)\n"
+)
+
+# Progress labels for the file_search stages of a streamed response
+PROGRESS_LABELS = {
+    "response.file_search_call.in_progress": "Starting document search…",
+    "response.file_search_call.searching": "Searching documents…",
+    "response.file_search_call.completed": "Writing from the retrieved passages…",
+}
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize this real estate due diligence conversation in a short paragraph. "
+    "Keep key facts, figures, risks, and open questions."
+)
+
+
+@st.cache_resource
+def get_client():
+    """
+    OpenAI client shared across reruns and sessions, so its (HTTP/2)
+    connection pool is reused instead of rebuilt on every script run.
+    """
+    return OpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        http_client=DefaultHttpxClient(http2=True, limits=HTTP_LIMITS),
+    )
+
+
+def find_vector_store(vs_id):
+    """
+    Id of the property vector store named in the URL, or None if there is
+    none (or it has expired or been deleted, or was not created by this app).
+    The store itself is created on the first upload, see create_vector_store.
+    """
+    if not vs_id:
+        return None
+    try:
+        vs = client.vector_stores.retrieve(vs_id)
+    except NotFoundError:
+        return None
+    metadata = vs.metadata or {}
+    if any(metadata.get(key) != value for key, value in VECTOR_STORE_METADATA.items()):
+        return None
+    return vs.id
+
+
+def create_vector_store() -> str:
+    """
+    Create the vector store for this property's documents and record its id
+    in the URL, so a reload (or a shared link) reopens the same documents.
+    """
+    vs = client.vector_stores.create(
+        name=VECTOR_STORE_NAME,
+        metadata=VECTOR_STORE_METADATA,
+        expires_after={"anchor": "last_active_at", "days": VECTOR_STORE_TTL_DAYS},
+    )
+    st.query_params["vs"] = vs.id
+    return vs.id
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_indexed_files(vs_id):
+    """
+    Files already indexed in the property's vector store (e.g. before a page
+    reload), as (digest, filename, file_id) tuples. Digest and filename
+    come from the attributes we attach them with; files without those fall
+    back to a files.retrieve lookup and have no digest.
+    """
+    indexed = []
+    if vs_id is None:
+        return indexed
+    for vs_file in client.vector_stores.files.list(vector_store_id=vs_id, limit=100):
+        if vs_file.status != "completed":
+            continue
+        attributes = vs_file.attributes or {}
+        name = attributes.get("filename") or client.files.retrieve(vs_file.id).filename
+        indexed.append((attributes.get("digest"), name, vs_file.id))
+    return indexed
+
+
+def delete_files(file_ids):
+    """
+    Delete uploaded files from OpenAI storage, skipping any already gone.
+    """
+    for file_id in file_ids:
+        with suppress(NotFoundError):
+            client.files.delete(file_id)
+
+
+def clear_documents():
+    """
+    Delete this property's vector store and uploaded files, and reset the
+    session so the next upload starts a new property.
+    """
+    file_ids = list(st.session_state.file_id_to_name)
+    for files in st.session_state.pending_batches.values():
+        file_ids += [file_id for _, _, _, file_id in files]
+    delete_files(file_ids)
+    with suppress(NotFoundError):
+        client.vector_stores.delete(st.session_state.vs_id)
+    load_indexed_files.clear()
+
+    for key in ("vs_id", "indexed_filenames", "pending_batches", "chat_history",
+                "conversation_id", "investor_batch_id", "investor_batch_memo"):
+        st.session_state.pop(key, None)
+    st.session_state.uploader_key += 1
+    del st.query_params["vs"]
+
+
 # Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = get_client()
 
 # ---- Session State ----
+# Vector store holding this property's documents (None until the first upload)
 if "vs_id" not in st.session_state:
-    vs = client.vector_stores.create(name="real_estate_due_diligence_store")
-    st.session_state.vs_id = vs.id
+    st.session_state.vs_id = find_vector_store(st.query_params.get("vs"))
 
-# Track which filenames we've indexed (session-only)
+# Bumped to reset the file uploader when the documents are cleared
+if "uploader_key" not in st.session_state:
+    st.session_state.uploader_key = 0
+
+# Indexed documents, seeded from the vector store so a reload doesn't re-upload them:
+# - indexed_filenames: filenames, kept sorted for display
+# - indexed_hashes: content digests of indexed (or still indexing) files, used for dedup
+# - file_id_to_name: filename per OpenAI file id, to resolve citations without an API call
 if "indexed_filenames" not in st.session_state:
-    st.session_state.indexed_filenames = set()
+    indexed = load_indexed_files(st.session_state.vs_id)
+    st.session_state.indexed_filenames = sorted(name for _, name, _ in indexed)
+    st.session_state.indexed_hashes = {digest for digest, _, _ in indexed if digest}
+    st.session_state.file_id_to_name = {file_id: name for _, name, file_id in indexed}
+
+# Digest per uploader file_id, so reruns don't re-hash the same upload
+if "upload_digests" not in st.session_state:
+    st.session_state.upload_digests = {}
+
+# Vector-store file batches still being indexed:
+# batch id -> [(upload_id, digest, filename, file_id), ...]
+if "pending_batches" not in st.session_state:
+    st.session_state.pending_batches = {}
+
+# Uploader file ids whose indexing failed; removing and re-adding a file retries it
+if "failed_uploads" not in st.session_state:
+    st.session_state.failed_uploads = set()
 
 # Chat history: list of {"role": "user"/"assistant", "content": "..."}
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
+# Stable id for this conversation, used as its prompt cache key
+if "conversation_id" not in st.session_state:
+    st.session_state.conversation_id = uuid.uuid4().hex
+
 # Selected model
 if "model_choice" not in st.session_state:
     st.session_state.model_choice = "gpt-5-mini"
 
 
-def rag_call(messages, instructions):
+def parse_response(response):
     """
-    Core RAG call: given messages + instructions,
-    call Responses API with file_search pointed at our vector store.
+    Walk a response's output once, collecting the answer text and the
+    filenames its file_citation annotations point to.
     Returns (answer_text, used_files).
     """
+    texts = []
+    used_files = set()
+    for block in response.output or []:
+        if block.type != "message":
+            continue
+        for part in block.content:
+            if part.type != "output_text":
+                continue
+            texts.append(part.text)
+            for a in part.annotations or []:
+                if a.type == "file_citation":
+                    used_files.add(st.session_state.file_id_to_name.get(a.file_id, a.filename))
+
+    return "".join(texts) or "_No text output._", sorted(used_files)
+
+
+@st.cache_data(max_entries=256, ttl=24 * 3600, show_spinner=False)
+def summarize_history(history):
+    """
+    Condense older chat turns into a short summary using SUMMARY_MODEL.
+    Cached on the turns themselves, so each prefix is summarized once.
+    """
+    transcript = "\n\n".join(f"{msg['role']}: {msg['content']}" for msg in history)
     response = client.responses.create(
+        model=SUMMARY_MODEL,
+        instructions=SUMMARY_INSTRUCTIONS,
+        input=transcript,
+    )
+    return response.output_text
+
+
+def trimmed_history(history, k: int = HISTORY_TURNS):
+    """
+    Chat history to send to the model: recent turns verbatim, older turns
+    replaced by a single summary message. History is cut in blocks of `k`
+    turns, so the summary only changes every `k` turns.
+    Short histories are returned as-is (not copied); callers build a new list.
+    """
+    window = 2 * k
+    cut = (len(history) // window - 1) * window
+    if cut <= 0:
+        return history
+
+    summary = summarize_history(history[:cut])
+    return [
+        {"role": "system", "content": f"Prior conversation summary: {summary}"},
+        *history[cut:],
+    ]
+
+
+def file_search_tools():
+    """
+    Tools for a RAG call: file_search pointed at our vector store.
+    """
+    return [{**FILE_SEARCH_TOOL_TEMPLATE, "vector_store_ids": [st.session_state.vs_id]}]
+
+
+def prompt_cache_key():
+    """
+    Key routing this conversation's RAG calls to the same prompt cache.
+    Instructions, tools and earlier turns are sent first and unchanged, so
+    each new turn reuses the cached prefix of the previous one.
+    """
+    return f"re-rag-{st.session_state.conversation_id}"
+
+
+def rag_call_stream(messages, instructions, used_files=None, on_progress=None):
+    """
+    Core RAG call: given messages + instructions, stream a Responses API
+    call with file_search pointed at our vector store.
+    Yields answer text deltas as they arrive. If `used_files` is a list,
+    it is filled with the source filenames once the response has completed.
+    If `on_progress` is given, it is called with a PROGRESS_LABELS label as
+    the file_search call moves through its stages.
+    """
+    with client.responses.stream(
         model=st.session_state.model_choice,
         instructions=instructions,
-        tools=[
-            {
-                "type": "file_search",
-                "vector_store_ids": [st.session_state.vs_id],
-            }
-        ],
+        tools=file_search_tools(),
         input=messages,
+        prompt_cache_key=prompt_cache_key(),
+    ) as stream:
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                yield event.delta
+            elif on_progress is not None and event.type in PROGRESS_LABELS:
+                on_progress(PROGRESS_LABELS[event.type])
+        response = stream.get_final_response()
+
+    if used_files is not None:
+        used_files.extend(parse_response(response)[1])
+
+
+def rag_batch_submit(messages, instructions) -> str:
+    """
+    Queue the same request as rag_call_stream on the Batch API: roughly half the
+    cost, but it completes asynchronously (within 24h).
+    Returns the batch id.
+    """
+    request = {
+        "custom_id": f"memo-{uuid.uuid4()}",
+        "method": "POST",
+        "url": "/v1/responses",
+        "body": {
+            "model": st.session_state.model_choice,
+            "instructions": instructions,
+            "tools": file_search_tools(),
+            "input": messages,
+            "prompt_cache_key": prompt_cache_key(),
+        },
+    }
+    batch_input = client.files.create(
+        file=("investor_memo_batch.jsonl", (json.dumps(request) + "\n").encode()),
+        purpose="batch",
     )
+    batch = client.batches.create(
+        input_file_id=batch_input.id,
+        endpoint="/v1/responses",
+        completion_window="24h",
+    )
+    return batch.id
 
-    answer_text = response.output_text or "_No text output._"
 
-    used_files = []
-    try:
-        for block in response.output or []:
-            for c in getattr(block, "content", []) or []:
-                if getattr(c, "type", "") == "tool_result" and getattr(c, "tool_name", "") == "file_search":
-                    for r in c.results or []:
-                        if hasattr(r, "file_name"):
-                            used_files.append(r.file_name)
-    except Exception:
-        pass
+def rag_batch_result(batch_id: str):
+    """
+    Check on a batch queued by rag_batch_submit.
+    Returns (status, answer_text, used_files); answer_text is None until
+    the batch has completed successfully.
+    """
+    batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        return batch.status, None, []
+    if not batch.output_file_id:
+        return "failed", None, []
+
+    result = json.loads(client.files.content(batch.output_file_id).text.splitlines()[0])
+    if result.get("error") or result["response"]["status_code"] != 200:
+        return "failed", None, []
+
+    response = Response.construct(**result["response"]["body"])
+    answer_text, used_files = parse_response(response)
 
-    return answer_text, sorted(set(used_files))
+    return batch.status, answer_text, used_files
 
 
-def ask_model(question: str, instructions: str, update_history: bool = True):
+def ask_model(question: str, instructions: str, used_files=None):
     """
-    RAG helper for chat:
-    - Build messages from chat_history + new question.
-    - Call rag_call.
-    - Optionally update chat_history.
+    Streaming RAG helper for chat:
+    - Build messages from (trimmed) chat_history + new question.
+    - Yield the answer from rag_call_stream as it arrives.
     """
-    messages = [
-        {"role": msg["role"], "content": msg["content"]}
-        for msg in st.session_state.chat_history
-    ]
-    messages.append({"role": "user", "content": question})
+    # chat_history entries are already API-shaped messages, so no per-message copy
+    messages = [*trimmed_history(st.session_state.chat_history), {"role": "user", "content": question}]
+
+    yield from rag_call_stream(messages, instructions, used_files)
+
+
+def file_digest(f) -> str:
+    """
+    Content hash of an uploaded file, memoized per upload across reruns.
+    """
+    # UploadedFile is a BytesIO built from the upload's bytes: getvalue() hands
+    # back that same buffer without copying, regardless of the read position.
+    # read() would move the cursor to the end, so the later read in upload_files
+    # would get b"" and upload an empty file; getbuffer() forces a full copy.
+    digest = st.session_state.upload_digests.get(f.file_id)
+    if digest is None:
+        digest = hashlib.blake2b(f.getvalue(), digest_size=16).hexdigest()
+        st.session_state.upload_digests[f.file_id] = digest
+    return digest
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def rendered_history(history):
+    """
+    Markdown for earlier chat turns, given as (role, content) pairs,
+    rendered as a single block instead of one chat message per turn.
+    """
+    return "\n".join(
+        f"**{'You' if role == 'user' else 'Assistant'}:**\n\n{content}\n\n---\n"
+        for role, content in history
+    )
+
+
+async def upload_files(files):
+    """
+    Upload files to OpenAI concurrently (at most UPLOAD_CONCURRENCY in flight).
+    Rate-limited (429) requests are retried with backoff by the SDK.
+    Returns the uploaded file ids, in the same order as `files`. If any
+    upload fails, the files that did upload are deleted and the error raised.
+    """
+    # The async client is bound to this call's event loop, so it's built per call
+    # rather than cached; all uploads share its HTTP/2 connection pool.
+    async with AsyncOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        max_retries=5,
+        timeout=Timeout(60.0, connect=5.0),
+        http_client=DefaultAsyncHttpxClient(http2=True, limits=HTTP_LIMITS),
+    ) as async_client:
+        sem = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+        async def upload_one(f):
+            async with sem:
+                # Same zero-copy buffer as file_digest; sent as-is in the multipart body
+                uploaded = await async_client.files.create(
+                    file=(f.name, f.getvalue()),
+                    purpose="assistants",
+                )
+            return uploaded.id
 
-    answer_text, used_files = rag_call(messages, instructions)
+        results = await asyncio.gather(*(upload_one(f) for f in files), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            for file_id in results:
+                if not isinstance(file_id, BaseException):
+                    with suppress(NotFoundError):
+                        await async_client.files.delete(file_id)
+            raise errors[0]
+        return results
 
-    if update_history:
-        st.session_state.chat_history.append({"role": "user", "content": question})
-        st.session_state.chat_history.append({"role": "assistant", "content": answer_text})
 
-    return answer_text, used_files
+@st.fragment(run_every=2)
+def indexing_status():
+    """
+    Poll pending file batches in the background, showing how many files are
+    ready, while already-indexed documents stay usable. Finished batches are
+    moved into the indexed state and the whole app is rerun.
+    """
+    ready = total = 0
+    finished = False
+    for batch_id, files in list(st.session_state.pending_batches.items()):
+        batch = client.vector_stores.file_batches.retrieve(
+            batch_id,
+            vector_store_id=st.session_state.vs_id,
+        )
+        if batch.status == "in_progress":
+            ready += batch.file_counts.completed
+            total += batch.file_counts.total
+            continue
+
+        del st.session_state.pending_batches[batch_id]
+        finished = True
+        # A completed batch can still contain failed files (e.g. unsupported formats);
+        # those only show up in file_counts.failed
+        if batch.status != "completed":
+            failed_ids = {file_id for _, _, _, file_id in files}
+        elif batch.file_counts.failed:
+            failed_ids = {
+                vs_file.id
+                for vs_file in client.vector_stores.file_batches.list_files(
+                    batch_id,
+                    vector_store_id=st.session_state.vs_id,
+                    filter="failed",
+                )
+            }
+        else:
+            failed_ids = set()
+
+        indexed = [entry for entry in files if entry[3] not in failed_ids]
+        failed = [entry for entry in files if entry[3] in failed_ids]
+        if indexed:
+            for _, _, name, file_id in indexed:
+                bisect.insort(st.session_state.indexed_filenames, name)
+                st.session_state.file_id_to_name[file_id] = name
+            st.session_state.newly_indexed_count = (
+                st.session_state.get("newly_indexed_count", 0) + len(indexed)
+            )
+            load_indexed_files.clear()
+        if failed:
+            # Forget the digests so the files are indexed again once re-uploaded
+            st.session_state.indexed_hashes.difference_update(digest for _, digest, _, _ in failed)
+            st.session_state.failed_uploads.update(upload_id for upload_id, _, _, _ in failed)
+            delete_files(file_id for _, _, _, file_id in failed)
+            st.session_state.indexing_error = batch.status if batch.status != "completed" else "failed"
+
+    if finished:
+        st.rerun()
+
+    st.info(f"Indexing new documents: {ready} of {total} file(s) ready…")
 
 
 # -----------------------------
@@ -99,38 +529,80 @@ st.subheader("1. Upload Real Estate Documents")
 uploaded_files = st.file_uploader(
     "Upload PDFs, text files, or doc files (inspection, disclosures, HOA, appraisal, etc.)",
     accept_multiple_files=True,
+    key=f"uploader_{st.session_state.uploader_key}",
 )
 
-newly_indexed_count = 0
-
 if uploaded_files:
-    with st.spinner("Indexing new documents…"):
-        for f in uploaded_files:
-            if f.name not in st.session_state.indexed_filenames:
-                uploaded = client.files.create(
-                    file=(f.name, f.read()),
-                    purpose="assistants",
-                )
-                client.vector_stores.files.create(
+    # Dedup on content rather than filename: renamed copies are skipped,
+    # while different files that share a name are both indexed.
+    new_files = {}
+    failed_files = []
+    for f in uploaded_files:
+        if f.file_id in st.session_state.failed_uploads:
+            failed_files.append(f.name)
+            continue
+        digest = file_digest(f)
+        if digest not in st.session_state.indexed_hashes:
+            new_files.setdefault(digest, f)
+
+    if new_files:
+        with st.spinner("Uploading new documents…"):
+            if st.session_state.vs_id is None:
+                st.session_state.vs_id = create_vector_store()
+            file_ids = asyncio.run(upload_files(new_files.values()))
+            # Attach all new files in one request without waiting for it: embedding
+            # runs server-side while indexing_status polls for completion. Digest and
+            # filename are stored on each file so later sessions can dedup against it.
+            try:
+                batch = client.vector_stores.file_batches.create(
                     vector_store_id=st.session_state.vs_id,
-                    file_id=uploaded.id,
+                    files=[
+                        {"file_id": file_id, "attributes": {"digest": digest, "filename": f.name}}
+                        for (digest, f), file_id in zip(new_files.items(), file_ids)
+                    ],
                 )
-                st.session_state.indexed_filenames.add(f.name)
-                newly_indexed_count += 1
-
-    if newly_indexed_count > 0:
-        st.success(f"Indexed {newly_indexed_count} new document(s). You can now chat with them below. 👇")
+            except Exception:
+                # Nothing tracks these files yet, so don't leave them in storage
+                delete_files(file_ids)
+                raise
+        st.session_state.indexed_hashes.update(new_files)
+        st.session_state.pending_batches[batch.id] = [
+            (f.file_id, digest, f.name, file_id)
+            for (digest, f), file_id in zip(new_files.items(), file_ids)
+        ]
+
+# Outcome of batches that finished since the last run (set by indexing_status)
+newly_indexed_count = st.session_state.pop("newly_indexed_count", 0)
+indexing_error = st.session_state.pop("indexing_error", None)
+
+if newly_indexed_count > 0:
+    st.success(f"Indexed {newly_indexed_count} new document(s). You can now chat with them below. 👇")
+if indexing_error:
+    st.error(f"Indexing did not complete (status: {indexing_error}). Remove and re-add the files to try again.")
+
+if st.session_state.pending_batches:
+    indexing_status()
+elif uploaded_files and not (newly_indexed_count or indexing_error):
+    if failed_files:
+        st.warning("Not indexed: " + ", ".join(failed_files) + ". Remove and re-add them to try again.")
     else:
-        st.info("All uploaded documents are already indexed in this session.")
+        st.info("All uploaded documents are already indexed.")
 
 if st.session_state.indexed_filenames:
     st.caption(
         "Indexed documents: "
-        + ", ".join(sorted(st.session_state.indexed_filenames))
+        + ", ".join(st.session_state.indexed_filenames)
     )
 else:
     st.caption("No documents indexed yet. Upload files to begin.")
 
+if st.session_state.vs_id is not None and st.button(
+    "Clear documents",
+    help="Delete this property's documents and chat, and start over with a new property.",
+):
+    clear_documents()
+    st.rerun()
+
 
 # -----------------------------
 # 2. Model Selector
@@ -152,8 +624,13 @@ st.subheader("3. Chat with This Property's Documents")
 if not st.session_state.indexed_filenames:
     st.info("Please upload at least one document before starting the chat.")
 else:
-    # Render chat history
-    for msg in st.session_state.chat_history:
+    # Render chat history: earlier turns as one cached markdown block,
+    # only the latest turn as chat messages
+    history = st.session_state.chat_history
+    if len(history) > 2:
+        st.markdown(rendered_history(tuple((msg["role"], msg["content"]) for msg in history[:-2])))
+
+    for msg in history[-2:]:
         if msg["role"] == "user":
             with st.chat_message("user"):
                 st.markdown(msg["content"])
@@ -167,17 +644,20 @@ else:
     )
 
     if follow_up:
-        with st.spinner("Analyzing documents…"):
-            instructions = (
-                "You are a real estate due diligence analyst. "
-                "Use ONLY the uploaded documents (inspection reports, seller disclosures, appraisals, "
-                "HOA documents, etc.) to answer. Highlight major risks, estimated impact, and any "
-                "missing information. When possible, reference the source filenames."
-            )
-            answer_text, used_files = ask_model(follow_up, instructions, update_history=True)
-
-        # Force rerun so the new Q&A renders in the history loop
-        st.rerun()
+        # Render the new turn in place (no rerun needed) and stream the answer
+        # as it is generated
+        with st.chat_message("user"):
+            st.markdown(follow_up)
+        with st.chat_message("assistant"):
+            used_files = []
+            answer_text = st.write_stream(ask_model(follow_up, RAG_INSTRUCTIONS, used_files))
+            if used_files:
+                st.caption("Sources: " + ", ".join(used_files))
+
+        st.session_state.chat_history += [
+            {"role": "user", "content": follow_up},
+            {"role": "assistant", "content": answer_text or "_No text output._"},
+        ]
 
 
 # -----------------------------
@@ -193,40 +673,65 @@ st.markdown(
 if not st.session_state.indexed_filenames:
     st.info("Upload and index documents first to generate an investor summary.")
 else:
-    if st.button("Generate Investor Summary"):
-        with st.spinner("Generating investor summary…"):
-            # For investor summary, we DON'T add another chat turn, but we
-            # still give the model some context from the chat if it exists.
-            messages = [
-                {"role": msg["role"], "content": msg["content"]}
-                for msg in st.session_state.chat_history
-            ]
-            messages.append(
-                {
-                    "role": "user",
-                    "content": (
-                        "Create an investor-style memo for this property based ONLY on the uploaded documents. "
-                        "Include the following sections:\n"
-                        "1. High-Level Summary\n"
-                        "2. Property Condition Overview\n"
-                        "3. Major Risks (with severity)\n"
-                        "4. Recommended Repairs / Capex Items\n"
-                        "5. Potential Upside or Opportunities\n"
-                        "6. Overall Recommendation (e.g., Buy / Cautious Buy / Pass)\n"
-                    ),
-                }
-            )
-
-            investor_instructions = (
-                "You are a real estate investment analyst. "
-                "Write clear, concise, investor-ready memos. "
-                "Be specific and tie every claim back to the uploaded documents wherever possible."
-            )
+    col_generate, col_queue = st.columns(2)
+    generate = col_generate.button("Generate Investor Summary")
+    queue = col_queue.button(
+        "Queue via Batch API",
+        help="About half the cost, but the memo is generated asynchronously and can take a while.",
+    )
 
-            investor_text, investor_files = rag_call(messages, investor_instructions)
+    if generate or queue:
+        # For investor summary, we DON'T add another chat turn, but we
+        # still give the model some context from the chat if it exists.
+        messages = [*trimmed_history(st.session_state.chat_history), {"role": "user", "content": INVESTOR_PROMPT}]
 
+    if generate:
+        # Stream the memo as it is written; the status line follows the file_search stages
+        memo_status = st.status("Generating investor summary…")
         st.markdown("### Investor Memo")
-        st.markdown(investor_text or "_No investor summary generated._")
+        investor_files = []
+        try:
+            investor_text = st.write_stream(
+                rag_call_stream(
+                    messages,
+                    INVESTOR_INSTRUCTIONS,
+                    investor_files,
+                    on_progress=lambda label: memo_status.update(label=label),
+                )
+            )
+        except Exception:
+            memo_status.update(label="Investor summary failed", state="error")
+            raise
+        if not investor_text:
+            st.markdown("_No investor summary generated._")
+        memo_status.update(label="Investor summary generated", state="complete")
 
         if investor_files:
             st.caption("Investor memo sources: " + ", ".join(investor_files))
+
+    if queue:
+        st.session_state.investor_batch_id = rag_batch_submit(messages, INVESTOR_INSTRUCTIONS)
+        st.session_state.pop("investor_batch_memo", None)
+
+    # Poll a queued batch on each rerun until its memo is ready
+    if "investor_batch_id" in st.session_state:
+        status, batch_text, batch_files = rag_batch_result(st.session_state.investor_batch_id)
+        if batch_text is not None:
+            st.session_state.investor_batch_memo = (batch_text, batch_files)
+            del st.session_state.investor_batch_id
+        elif status in ("failed", "expired", "cancelled"):
+            st.error(f"Queued investor summary did not complete (status: {status}).")
+            del st.session_state.investor_batch_id
+        else:
+            st.info(
+                f"Investor summary queued via Batch API (status: {status}). "
+                "It will show up here once the batch completes."
+            )
+
+    if "investor_batch_memo" in st.session_state:
+        batch_text, batch_files = st.session_state.investor_batch_memo
+        st.markdown("### Investor Memo (Batch API)")
+        st.markdown(batch_text)
+
+        if batch_files:
+            st.caption("Investor memo sources: " + ", ".join(batch_files))